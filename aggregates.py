@@ -0,0 +1,228 @@
+﻿from collections import Counter
+import json
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+FACET_FILTERS = {
+    "carrera": "Filtro_Carrera",
+    "categoria": "Filtro_Categoria",
+    "ano": "Filtro_AnoEscolar",
+    "modalidad": "Filtro_Modalidad",
+    "evento": "Filtro_Evento",
+}
+
+MAX_FILTER_SETS = 256
+
+# (facets, students, lowercase name) where facets maps group -> (value, label, aliases)
+ProjectFacets = Tuple[Tuple[Tuple[str, str, str, Tuple[str, ...]], ...], Tuple[Any, ...], str]
+
+
+def _ref_facet(group: str, ref: Any, by_name: bool) -> Optional[Tuple[str, str, str, Tuple[str, ...]]]:
+    if not ref:
+        return None
+    ref_id = ref.get("Id")
+    nombre = ref.get("Nombre")
+    if by_name:
+        if not nombre:
+            return None
+        aliases = (str(ref_id),) if ref_id else ()
+        return group, nombre, nombre, aliases
+    if not ref_id or not nombre:
+        return None
+    return group, str(ref_id), nombre, ()
+
+
+def project_facets(project: Dict[str, Any]) -> ProjectFacets:
+    facets = []
+    carrera = project.get("Carrera")
+    if carrera:
+        facets.append(("carrera", carrera, carrera, ()))
+    ano = project.get("CicloEscolarAno")
+    if ano:
+        facets.append(("ano", ano, ano, ()))
+    for group, key, by_name in (
+        ("categoria", "Categoria", True),
+        ("modalidad", "Modalidad", False),
+        ("evento", "Evento", False),
+    ):
+        facet = _ref_facet(group, project.get(key, {}), by_name)
+        if facet:
+            facets.append(facet)
+    students = tuple(project.get("Alumnos", []) or [])
+    nombre = str(project.get("Nombre") or "").lower()
+    return tuple(facets), students, nombre
+
+
+def _filter_values(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value if item]
+    return [str(value)] if value else []
+
+
+class ProjectAggregates:
+    def __init__(self):
+        self._lock = Lock()
+        self._projects: Dict[Any, ProjectFacets] = {}
+        self._categories: Counter = Counter()
+        self._students: Counter = Counter()
+        self._facets: Dict[str, Counter] = {group: Counter() for group in FACET_FILTERS}
+        self._labels: Dict[Tuple[str, str], str] = {}
+        self._filtered: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self.upstream_total = 0
+        self.synced = False
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._projects)
+
+    def _apply(self, facets: ProjectFacets, sign: int) -> None:
+        groups, students, _ = facets
+        for group, value, label, _ in groups:
+            self._facets[group][value] += sign
+            if self._facets[group][value] <= 0:
+                del self._facets[group][value]
+            else:
+                self._labels[(group, value)] = label
+            if group == "categoria":
+                self._categories[value] += sign
+                if self._categories[value] <= 0:
+                    del self._categories[value]
+        for student in students:
+            self._students[student] += sign
+            if self._students[student] <= 0:
+                del self._students[student]
+
+    def observe(self, projects: Iterable[Dict[str, Any]], total: Optional[int] = None) -> None:
+        with self._lock:
+            changed = False
+            for project in projects or []:
+                project_id = project.get("Id")
+                if project_id is None:
+                    continue
+                facets = project_facets(project)
+                previous = self._projects.get(project_id)
+                if previous == facets:
+                    continue
+                if previous is not None:
+                    self._apply(previous, -1)
+                self._apply(facets, 1)
+                self._projects[project_id] = facets
+                changed = True
+            if total is not None and int(total or 0) != self.upstream_total:
+                self.upstream_total = int(total or 0)
+                changed = True
+            if changed:
+                self.version += 1
+                self._filtered.clear()
+
+    def discard(self, project_ids: Iterable[Any]) -> None:
+        with self._lock:
+            changed = False
+            for project_id in project_ids:
+                facets = self._projects.pop(project_id, None)
+                if facets is not None:
+                    self._apply(facets, -1)
+                    changed = True
+            if changed:
+                self.version += 1
+                self._filtered.clear()
+
+    def discard_categories(self, categories: Iterable[str]) -> None:
+        wanted = {str(item) for item in categories}
+        matching = []
+        with self._lock:
+            for project_id, (groups, _, _) in self._projects.items():
+                for group, value, _, aliases in groups:
+                    if group == "categoria" and (value in wanted or wanted.intersection(aliases)):
+                        matching.append(project_id)
+                        break
+        self.discard(matching)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._projects.clear()
+            self._categories.clear()
+            self._students.clear()
+            for counter in self._facets.values():
+                counter.clear()
+            self._labels.clear()
+            self._filtered.clear()
+            self.upstream_total = 0
+            self.synced = False
+            self.version += 1
+
+    def prune(self, keep_ids: Iterable[Any]) -> None:
+        keep = set(keep_ids)
+        self.discard([project_id for project_id in list(self._projects) if project_id not in keep])
+
+    def complete_sync(self, keep_ids: Iterable[Any], total: Optional[int]) -> None:
+        self.prune(keep_ids)
+        self.observe([], total=total)
+        self.synced = True
+
+    @property
+    def covers_archive(self) -> bool:
+        # Counts from a partial view of the archive would be misleading, so only
+        # answer after a full scan and while no newer project is known upstream.
+        return self.synced and bool(self._projects) and len(self._projects) >= self.upstream_total
+
+    def stats(self) -> Dict[str, int]:
+        if not self.covers_archive:
+            return {}
+        return {
+            "total": len(self._projects),
+            "categories": len(self._categories),
+            "students": len(self._students),
+        }
+
+    def facet_options(self, filters: Dict[str, Any] = None) -> Dict[str, List[Dict[str, Any]]]:
+        if not self.covers_archive:
+            return {}
+        key = json.dumps(filters or {}, sort_keys=True)
+        cached = self._filtered.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            if filters:
+                counts: Dict[str, Counter] = {group: Counter() for group in FACET_FILTERS}
+                for facets in self._projects.values():
+                    if self._matches(facets, filters):
+                        for group, value, _, _ in facets[0]:
+                            counts[group][value] += 1
+            else:
+                counts = self._facets
+            options = self._format(counts)
+            if len(self._filtered) >= MAX_FILTER_SETS:
+                self._filtered.clear()
+            self._filtered[key] = options
+        return options
+
+    def _matches(self, facets: ProjectFacets, filters: Dict[str, Any]) -> bool:
+        groups, _, nombre = facets
+        texto = str(filters.get("Filtro_Nombre") or "").lower()
+        if texto and texto not in nombre:
+            return False
+        for group, api_key in FACET_FILTERS.items():
+            wanted = _filter_values(filters.get(api_key))
+            if not wanted:
+                continue
+            if not any(
+                facet_group == group and (value in wanted or any(alias in wanted for alias in aliases))
+                for facet_group, value, _, aliases in groups
+            ):
+                return False
+        return True
+
+    def _format(self, counts: Dict[str, Counter]) -> Dict[str, List[Dict[str, Any]]]:
+        options = {}
+        for group, values in counts.items():
+            if not values:
+                continue
+            options[group] = sorted(
+                (
+                    {"value": value, "label": self._labels.get((group, value), value), "total": total}
+                    for value, total in values.items()
+                ),
+                key=lambda item: item["label"],
+            )
+        return options
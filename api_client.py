@@ -1,16 +1,154 @@
-﻿from typing import Any, Dict, Optional, Tuple
+﻿import codecs
+from concurrent.futures import ThreadPoolExecutor
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
 
 from config import Settings
+from ratelimit import UpstreamBusy, upstream_limiter
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
-def fetch_projects(
+STREAM_CHUNK_SIZE = 64 * 1024
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CONTINUATION = frozenset("0123456789.eE+-")
+
+
+def decode_json(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _headers(settings: Settings) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {settings.api_token}",
+        "Content-Type": "application/json",
+    }
+
+
+def _upstream_slot(settings: Settings):
+    return upstream_limiter.slot(settings.upstream_concurrency, settings.upstream_queue_timeout)
+
+
+def _post(settings: Settings, payload: Dict[str, Any]) -> Dict[str, Any]:
+    with _upstream_slot(settings):
+        response = requests.post(
+            settings.api_base_url,
+            json=payload,
+            headers=_headers(settings),
+            timeout=settings.request_timeout,
+        )
+    response.raise_for_status()
+    return decode_json(response.content)
+
+
+def iter_json_list_items(
+    chunks: Iterable[bytes],
+    key: str = "Datos",
+    meta: Optional[Dict[str, Any]] = None,
+) -> Iterator[Any]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunk_iter = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        for chunk in chunk_iter:
+            if chunk:
+                buf = buf[pos:] + decoder.decode(chunk)
+                pos = 0
+                return True
+        buf = buf[pos:] + decoder.decode(b"", final=True)
+        pos = 0
+        eof = True
+        return True
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(char: str) -> None:
+        nonlocal pos
+        found = peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        pos += 1
+
+    def read_value() -> Any:
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                result, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            # A number at the end of the buffer may still be incomplete, e.g. "12." + "5".
+            if end >= len(buf) or (
+                isinstance(result, (int, float))
+                and not isinstance(result, bool)
+                and buf[end] in _NUMBER_CONTINUATION
+            ):
+                if fill():
+                    continue
+            pos = end
+            return result
+
+    expect("{")
+    if peek() == "}":
+        return
+    while True:
+        name = read_value()
+        expect(":")
+        if name == key and peek() == "[":
+            pos += 1
+            if peek() == "]":
+                pos += 1
+            else:
+                while True:
+                    yield read_value()
+                    separator = peek()
+                    pos += 1
+                    if separator == "]":
+                        break
+                    if separator != ",":
+                        raise ValueError(f"Unexpected {separator!r} in JSON list")
+        else:
+            item = read_value()
+            if meta is not None:
+                meta[name] = item
+        separator = peek()
+        pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Unexpected {separator!r} in JSON object")
+
+
+def stream_projects(
     settings: Settings,
     filters: Optional[Dict[str, Any]] = None,
     page: int = 1,
     limit: int = 24,
-) -> Dict[str, Any]:
+    meta: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Any]]:
     payload = {
         "Comando": "ListarProyectos",
         "Filtros": filters or {},
@@ -19,18 +157,56 @@ def fetch_projects(
             "Limite": limit,
         },
     }
-    headers = {
-        "Authorization": f"Bearer {settings.api_token}",
-        "Content-Type": "application/json",
-    }
-    response = requests.post(
+    with _upstream_slot(settings), requests.post(
         settings.api_base_url,
         json=payload,
-        headers=headers,
+        headers=_headers(settings),
         timeout=settings.request_timeout,
-    )
-    response.raise_for_status()
-    return response.json()
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+        yield from iter_json_list_items(
+            response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+            key="Datos",
+            meta=meta,
+        )
+
+
+def iter_all_projects(
+    settings: Settings,
+    filters: Optional[Dict[str, Any]] = None,
+    limit: int = 200,
+    max_pages: Optional[int] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Any]]:
+    meta = {} if meta is None else meta
+    page = 1
+    while max_pages is None or page <= max_pages:
+        count = 0
+        for project in stream_projects(settings, filters=filters, page=page, limit=limit, meta=meta):
+            count += 1
+            yield project
+        total = int(meta.get("Total", 0) or 0)
+        if count < limit or (total and page * limit >= total):
+            return
+        page += 1
+
+
+def fetch_projects(
+    settings: Settings,
+    filters: Optional[Dict[str, Any]] = None,
+    page: int = 1,
+    limit: int = 24,
+) -> Dict[str, Any]:
+    payload = {
+        "Comando": "ListarProyectos",
+        "Filtros": filters or {},
+        "Paginacion": {
+            "Pagina": page,
+            "Limite": limit,
+        },
+    }
+    return _post(settings, payload)
 
 
 def fetch_stats(
@@ -41,18 +217,7 @@ def fetch_stats(
         "Comando": "Estadisticas",
         "Filtros": filters or {},
     }
-    headers = {
-        "Authorization": f"Bearer {settings.api_token}",
-        "Content-Type": "application/json",
-    }
-    response = requests.post(
-        settings.api_base_url,
-        json=payload,
-        headers=headers,
-        timeout=settings.request_timeout,
-    )
-    response.raise_for_status()
-    return response.json()
+    return _post(settings, payload)
 
 
 def fetch_catalogs(
@@ -63,50 +228,62 @@ def fetch_catalogs(
         "Comando": "Catalogos",
         "Filtros": filters or {},
     }
-    headers = {
-        "Authorization": f"Bearer {settings.api_token}",
-        "Content-Type": "application/json",
+    return _post(settings, payload)
+
+
+def _unique_ids(project_ids: Iterable[Any]) -> List[int]:
+    seen = set()
+    ids = []
+    for item in project_ids:
+        if not str(item).isdigit():
+            continue
+        project_id = int(item)
+        if project_id not in seen:
+            seen.add(project_id)
+            ids.append(project_id)
+    return ids
+
+
+def _fetch_ids_chunk(settings: Settings, ids: List[int]) -> Dict[str, Any]:
+    payload = {
+        "Comando": "ListarProyectos",
+        "Filtros": {"Filtro_Ids": ids},
+        "Paginacion": {"Pagina": 1, "Limite": len(ids)},
     }
-    response = requests.post(
-        settings.api_base_url,
-        json=payload,
-        headers=headers,
-        timeout=settings.request_timeout,
-    )
-    response.raise_for_status()
-    return response.json()
+    return _post(settings, payload)
 
 
 def fetch_projects_by_ids(
     settings: Settings,
     project_ids: Optional[list] = None,
     limit: int = 200,
+    known: Optional[Dict[int, Any]] = None,
 ) -> Dict[str, Any]:
-    ids = [int(item) for item in (project_ids or []) if str(item).isdigit()]
-    if not ids:
-        return {
-            "Codigo": "1",
-            "Mensaje": "OK",
-            "Total": 0,
-            "Datos": [],
-        }
-    payload = {
-        "Comando": "ListarProyectos",
-        "Filtros": {"Filtro_Ids": ids},
-        "Paginacion": {"Pagina": 1, "Limite": min(max(len(ids), 1), limit)},
-    }
-    headers = {
-        "Authorization": f"Bearer {settings.api_token}",
-        "Content-Type": "application/json",
+    ids = _unique_ids(project_ids or [])
+    known = known or {}
+    missing = [project_id for project_id in ids if project_id not in known]
+    chunk_size = max(min(settings.ids_chunk_size, limit), 1)
+    chunks = [missing[index:index + chunk_size] for index in range(0, len(missing), chunk_size)]
+
+    if len(chunks) > 1 and settings.ids_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(settings.ids_workers, len(chunks))) as executor:
+            responses = list(executor.map(lambda chunk: _fetch_ids_chunk(settings, chunk), chunks))
+    else:
+        responses = [_fetch_ids_chunk(settings, chunk) for chunk in chunks]
+
+    projects_by_id = {project_id: known[project_id] for project_id in ids if project_id in known}
+    for data in responses:
+        for project in data.get("Datos", []) or []:
+            projects_by_id.setdefault(project.get("Id"), project)
+
+    datos = [projects_by_id[project_id] for project_id in ids if project_id in projects_by_id]
+    first = responses[0] if responses else {}
+    return {
+        "Codigo": first.get("Codigo", "1"),
+        "Mensaje": first.get("Mensaje", "OK"),
+        "Total": len(datos),
+        "Datos": datos,
     }
-    response = requests.post(
-        settings.api_base_url,
-        json=payload,
-        headers=headers,
-        timeout=settings.request_timeout,
-    )
-    response.raise_for_status()
-    return response.json()
 
 
 def find_project_by_id(
@@ -116,6 +293,8 @@ def find_project_by_id(
 ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
     try:
         data = fetch_projects_by_ids(settings, [project_id], limit=limit)
+    except UpstreamBusy:
+        raise
     except Exception:
         return None, None
     for project in data.get("Datos", []):
@@ -1,40 +1,103 @@
 ﻿from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+import hmac
+import json
+import os
+import sqlite3
 import sys
 import time
-from typing import Any, Dict, List, Tuple
-from urllib.parse import urlparse
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlencode, urlparse
 
 from authlib.integrations.base_client.errors import MismatchingStateError
 from authlib.integrations.flask_client import OAuth
-from flask import Flask, abort, redirect, render_template, request, session, url_for
+from flask import (
+    Flask,
+    Response,
+    abort,
+    copy_current_request_context,
+    g,
+    has_request_context,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_template,
+    url_for,
+)
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import TooManyRequests
+from werkzeug.middleware.proxy_fix import ProxyFix
 
+from aggregates import ProjectAggregates
 from api_client import (
     fetch_catalogs,
     fetch_projects,
     fetch_projects_by_ids,
     fetch_stats,
     find_project_by_id,
+    iter_all_projects,
 )
+from compression import compress_response
 from config import load_settings
+from models import compact_payload, compact_project
+from profiling import StackProfiler, parse_route_rates
+from ratelimit import RateLimiter, UpstreamBusy
+from streaming import LazyValue, coalesce_chunks
 from store import (
     add_admin,
     add_featured,
+    add_invalidation,
     init_db,
     is_admin,
+    latest_invalidation_id,
     list_admins,
     list_featured_ids,
+    list_invalidations_since,
     remove_admin,
     remove_featured,
 )
+from warmer import CacheWarmer
 
 app = Flask(__name__)
 settings = load_settings()
+if settings.trusted_proxies > 0:
+    app.wsgi_app = ProxyFix(
+        app.wsgi_app,
+        x_for=settings.trusted_proxies,
+        x_proto=settings.trusted_proxies,
+    )
 app.secret_key = settings.secret_key or "dev-secret"
 
 ALLOWED_DOMAIN = "modelo.edu.mx"
-RECENT_CACHE_TTL = 60
+CACHE_TTL = settings.cache_ttl
+CACHE_MAX_ENTRIES = 512
+RECENT_CACHE_TTL = CACHE_TTL
 _recent_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_stats_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_catalog_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_explore_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+PROJECT_CACHE_TTL = max(CACHE_TTL, 300)
+_project_cache: Dict[int, Tuple[float, Any]] = {}
+project_aggregates = ProjectAggregates()
+RATE_LIMITED_ENDPOINTS = {"index", "categoria", "recientes", "explorar", "proyecto"}
+MAX_EXPLORE_LIMIT = 96
+FILTER_PARAMS = {
+    "carrera": "Filtro_Carrera",
+    "categoria": "Filtro_Categoria",
+    "ano": "Filtro_AnoEscolar",
+    "modalidad": "Filtro_Modalidad",
+    "evento": "Filtro_Evento",
+}
+rate_limiter = RateLimiter(settings.rate_limit, settings.rate_limit_burst)
+_page_data_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="page-data")
+profiler = StackProfiler(
+    settings.profile_sample_rate,
+    parse_route_rates(settings.profile_routes),
+    interval=settings.profile_interval_ms / 1000,
+)
 
 
 oauth = OAuth(app)
@@ -49,7 +112,8 @@ oauth.register(
     client_kwargs={"scope": "openid email profile"},
 )
 
-init_db(settings.super_admin_email)
+init_db(settings.super_admin_email, auto_migrate=settings.db_auto_migrate)
+_invalidation_state = {"last_id": latest_invalidation_id(), "checked": time.time()}
 
 
 def azure_configured() -> bool:
@@ -82,6 +146,41 @@ def build_redirect_uri() -> str:
     return url_for("auth_callback", _external=True)
 
 
+@app.before_request
+def start_profile():
+    # Static files are served by the proxy in production; only views are profiled.
+    if request.endpoint != "static" and profiler.should_sample(request.endpoint):
+        g.profile_token = profiler.begin(request.endpoint)
+
+
+@app.teardown_request
+def end_profile(error=None):
+    token = g.pop("profile_token", None)
+    if token:
+        profiler.end(token)
+
+
+@app.before_request
+def sync_invalidations():
+    now = time.time()
+    if now - _invalidation_state["checked"] < settings.invalidation_poll:
+        return None
+    _invalidation_state["checked"] = now
+    try:
+        entries = list_invalidations_since(_invalidation_state["last_id"])
+    except sqlite3.Error:
+        return None
+    for entry in entries:
+        apply_invalidation(entry["scope"], entry["values"])
+        _invalidation_state["last_id"] = entry["id"]
+    return None
+
+
+@app.before_request
+def start_cache_warmer():
+    start_background_jobs()
+
+
 @app.before_request
 def enforce_canonical_host():
     if not is_absolute_url(settings.app_url):
@@ -96,6 +195,64 @@ def enforce_canonical_host():
     return redirect(target, code=302)
 
 
+@app.before_request
+def canonicalize_explore_query():
+    # Runs before the rate limiter so the redirect does not use up a token.
+    if request.endpoint == "index" and request.args.get("categoria"):
+        return redirect(url_for("categoria", value=request.args["categoria"]), code=301)
+    if request.endpoint != "explorar":
+        return None
+    args = canonical_args(request.args)
+    if is_canonical(request.args, args):
+        return None
+    return redirect(explorar_url(args), code=302)
+
+
+@app.before_request
+def apply_rate_limit():
+    if request.endpoint not in RATE_LIMITED_ENDPOINTS:
+        return None
+    retry_after = rate_limiter.hit((request.remote_addr, request.endpoint))
+    if retry_after is not None:
+        # Over the limit: the request may still be answered from cache.
+        g.rate_limited = retry_after
+    return None
+
+
+@app.after_request
+def compress(response):
+    if not settings.compress_responses:
+        return response
+    return compress_response(response, request.accept_encodings, settings.compress_min_size)
+
+
+@app.errorhandler(429)
+def too_many_requests(error):
+    retry_after = g.get("rate_limited") or 1
+    return (
+        render_template(
+            "admin_denied.html",
+            title="Demasiadas solicitudes",
+            message="Estas haciendo demasiadas consultas. Espera unos segundos e intenta de nuevo.",
+        ),
+        429,
+        {"Retry-After": str(retry_after)},
+    )
+
+
+@app.errorhandler(UpstreamBusy)
+def upstream_busy(error):
+    return (
+        render_template(
+            "admin_denied.html",
+            title="Servicio saturado",
+            message="El catalogo esta recibiendo muchas consultas. Intenta de nuevo en unos segundos.",
+        ),
+        503,
+        {"Retry-After": str(max(int(settings.upstream_queue_timeout + 0.999), 1))},
+    )
+
+
 def admin_required(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -122,29 +279,48 @@ def admin_required(func):
 
 @app.route("/")
 def index():
-    active_category = request.args.get("categoria")
+    return render_index()
+
+
+@app.route("/categoria/<path:value>")
+def categoria(value: str):
+    return render_index(value)
+
+
+def render_index(active_category: str = None):
+    return render_page(
+        "index.html",
+        lambda: index_context(active_category),
+        {"projects": [], "featured": [], "stats": build_stats({}, []), "categories": []},
+        active_category=active_category,
+    )
+
+
+def index_context(active_category: str = None) -> Dict[str, Any]:
     filters = {}
     if active_category:
         filters["Filtro_Categoria"] = active_category
     data = get_recent_data(filters)
     projects = data.get("Datos", [])
-    stats = extract_stats(safe_fetch_stats()) or build_stats(data, projects)
+    stats = (
+        extract_stats(get_stats_data())
+        or project_aggregates.stats()
+        or build_stats(data, projects)
+    )
     featured = load_featured_projects()
     if not featured:
         featured = projects[:3]
-    catalog_data = extract_catalogs(safe_fetch_catalogs())
+    catalog_data = extract_catalogs(get_catalog_data())
     categories = catalog_data.get("categoria", []) if catalog_data else []
     if not categories:
-        fallback = build_filter_options(projects)
+        fallback = project_aggregates.facet_options() or build_filter_options(projects)
         categories = fallback.get("categoria", [])
-    return render_template(
-        "index.html",
-        projects=projects,
-        featured=featured,
-        stats=stats,
-        categories=categories,
-        active_category=active_category,
-    )
+    return {
+        "projects": projects,
+        "featured": featured,
+        "stats": stats,
+        "categories": categories,
+    }
 
 
 @app.get("/recientes")
@@ -160,44 +336,96 @@ def recientes():
 
 @app.route("/explorar")
 def explorar():
-    filters = build_filters_from_query(request.args)
-    page = safe_int(request.args.get("page"), 1)
-    limit = safe_int(request.args.get("limit"), settings.default_limit)
-    data = safe_fetch_projects(filters=filters, page=page, limit=limit)
-    projects = data.get("Datos", [])
-    total = data.get("Total", 0)
-    options = extract_catalogs(safe_fetch_catalogs(filters=filters)) or build_filter_options(projects)
-    prev_url, next_url = build_pagination_urls(page, limit, total, request.args.to_dict())
-    active_filters = build_active_filters(request.args, options)
-    return render_template(
+    args = canonical_args(request.args)
+    filters = build_filters_from_query(args)
+    page = safe_int(args.get("page"), 1)
+    limit = safe_int(args.get("limit"), settings.default_limit)
+    return render_page(
         "explorar.html",
-        projects=projects,
-        total=total,
+        lambda: explore_context(args, filters, page, limit),
+        {
+            "projects": [],
+            "total": 0,
+            "options": {},
+            "prev_url": None,
+            "next_url": None,
+            "active_filters": [],
+        },
         page=page,
         limit=limit,
         filters=filters,
-        options=options,
-        prev_url=prev_url,
-        next_url=next_url,
-        active_filters=active_filters,
+    )
+
+
+def explore_context(args: MultiDict, filters: Dict[str, Any], page: int, limit: int) -> Dict[str, Any]:
+    data = get_explore_data(filters, page, limit)
+    projects = data.get("Datos", [])
+    total = data.get("Total", 0)
+    options = (
+        extract_catalogs(get_catalog_data(filters))
+        or project_aggregates.facet_options(filters)
+        or build_filter_options(projects)
+    )
+    prev_url, next_url = build_pagination_urls(page, limit, total, args)
+    active_filters = build_active_filters(args, options)
+    return {
+        "projects": projects,
+        "total": total,
+        "options": options,
+        "prev_url": prev_url,
+        "next_url": next_url,
+        "active_filters": active_filters,
+    }
+
+
+def render_page(
+    template_name: str,
+    loader: Callable[[], Dict[str, Any]],
+    fallback: Dict[str, Any],
+    **context: Any,
+):
+    # Rate-limited requests may need to fail with a 429, which is impossible
+    # once the response has started streaming.
+    if not settings.stream_templates or not upstream_allowed():
+        return render_template(template_name, **loader(), **context)
+    profile_token = g.get("profile_token")
+
+    @copy_current_request_context
+    def load() -> Dict[str, Any]:
+        # The status line and page head are already sent, so a failure here
+        # can only be shown as an empty page body.
+        try:
+            if profile_token:
+                with profiler.attach(profile_token[1]):
+                    return loader()
+            return loader()
+        except Exception:
+            app.logger.exception("Loading data for %s failed", template_name)
+            return fallback
+
+    future = _page_data_executor.submit(load)
+    context.update({key: LazyValue(future, key) for key in fallback})
+    return Response(
+        coalesce_chunks(stream_template(template_name, **context), future),
+        mimetype="text/html",
     )
 
 
 @app.route("/proyecto/<int:project_id>")
 def proyecto(project_id: int):
-    project, _ = find_project_by_id(settings, project_id)
+    project = get_cached_projects([project_id]).get(project_id)
     if not project:
-        abort(404)
+        require_upstream()
+        project, _ = find_project_by_id(settings, project_id)
+        if not project:
+            abort(404)
+        project = remember_projects([project])[0]
 
     related = []
     categoria = project.get("Categoria", {})
     categoria_id = categoria.get("Id")
     if categoria_id:
-        related_data = safe_fetch_projects(
-            filters={"Filtro_Categoria": str(categoria_id)},
-            page=1,
-            limit=6,
-        )
+        related_data = get_explore_data({"Filtro_Categoria": str(categoria_id)}, 1, 6)
         related = [
             item for item in related_data.get("Datos", []) if item.get("Id") != project_id
         ]
@@ -353,6 +581,65 @@ def admin_remove():
     return redirect(request.referrer or url_for("admin"))
 
 
+@app.route("/admin/profiles")
+@admin_required
+def admin_profiles():
+    return render_template(
+        "admin_profiles.html",
+        profiles=profiler.summary(),
+        enabled=profiler.enabled,
+    )
+
+
+@app.route("/admin/profiles/<route>.txt")
+@admin_required
+def admin_profile_download(route: str):
+    return Response(
+        profiler.collapsed(route),
+        mimetype="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{route}.folded.txt"'},
+    )
+
+
+@app.post("/admin/profiles/reset")
+@admin_required
+def admin_profiles_reset():
+    profiler.reset()
+    return redirect(url_for("admin_profiles"))
+
+
+@app.post("/api/invalidate")
+def api_invalidate():
+    if not settings.invalidation_token:
+        abort(404)
+    expected = f"Bearer {settings.invalidation_token}"
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+        abort(401)
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {}
+    if not isinstance(payload, dict) or not all(
+        isinstance(payload.get(key) or [], list) for key in ("ids", "categories")
+    ):
+        return jsonify({"ok": False, "error": "ids y categories deben ser listas"}), 400
+    scopes = []
+    if payload.get("all"):
+        scopes.append(("all", []))
+    else:
+        ids = [int(item) for item in payload.get("ids") or [] if str(item).isdigit()]
+        categories = [str(item) for item in payload.get("categories") or [] if str(item).strip()]
+        if ids:
+            scopes.append(("ids", ids))
+        if categories:
+            scopes.append(("categories", categories))
+    if not scopes:
+        return jsonify({"ok": False, "error": "Indica ids, categories o all"}), 400
+    for scope, values in scopes:
+        add_invalidation(scope, values)
+        apply_invalidation(scope, values)
+    return jsonify({"ok": True, "scopes": [scope for scope, _ in scopes]})
+
+
 def is_super_admin() -> bool:
     email = session.get("user_email", "").lower()
     if not settings.super_admin_email:
@@ -373,37 +660,236 @@ def extract_email(user: Dict[str, Any]) -> str:
     return str(email).strip()
 
 
-def load_featured_projects(featured_ids: List[int] = None) -> List[Dict[str, Any]]:
+def load_featured_projects(
+    featured_ids: List[int] = None,
+    refresh: bool = False,
+) -> List[Dict[str, Any]]:
     ids = featured_ids or list_featured_ids()
     if not ids:
         return []
+    known = {} if refresh else get_cached_projects(ids)
+    cached = [known[project_id] for project_id in ids if project_id in known]
+    if not upstream_allowed():
+        return cached
     try:
-        data = fetch_projects_by_ids(settings, ids)
+        data = fetch_projects_by_ids(settings, ids, known=known)
     except Exception:
-        return []
-    projects = data.get("Datos", [])
-    projects_by_id = {project.get("Id"): project for project in projects}
-    return [projects_by_id[project_id] for project_id in ids if project_id in projects_by_id]
+        # Featured cards are optional: a busy or failing API must not take
+        # the home page down with them.
+        return cached
+    return remember_projects(data.get("Datos", []))
 
 
-def get_recent_data(filters: Dict[str, Any]) -> Dict[str, Any]:
-    key = filters.get("Filtro_Categoria") or "__all__"
+def get_cached_projects(ids: List[int]) -> Dict[int, Any]:
     now = time.time()
-    cached = _recent_cache.get(key)
-    if cached and now - cached[0] < RECENT_CACHE_TTL:
+    found = {}
+    for project_id in ids:
+        cached = _project_cache.get(project_id)
+        if cached and now - cached[0] < PROJECT_CACHE_TTL:
+            found[project_id] = cached[1]
+    return found
+
+
+def remember_projects(projects: List[Dict[str, Any]]) -> List[Any]:
+    project_aggregates.observe(projects)
+    now = time.time()
+    compacted = []
+    for project in projects:
+        project = compact_project(project)
+        project_id = project.get("Id")
+        if project_id is not None:
+            cached = _project_cache.get(project_id)
+            if not cached or cached[1] is not project:
+                _project_cache[project_id] = (now, project)
+        compacted.append(project)
+    return compacted
+
+
+def upstream_allowed() -> bool:
+    return not (has_request_context() and g.get("rate_limited"))
+
+
+def require_upstream() -> None:
+    if not upstream_allowed():
+        raise TooManyRequests(retry_after=g.rate_limited)
+
+
+def filters_key(filters: Dict[str, Any] = None, *extra: Any) -> str:
+    return json.dumps([filters or {}, *extra], sort_keys=True)
+
+
+def response_ok(data: Dict[str, Any]) -> bool:
+    return bool(data) and str(data.get("Codigo", "1")) != "0"
+
+
+def cached_fetch(
+    cache: Dict[str, Tuple[float, Dict[str, Any]]],
+    key: str,
+    loader: Callable[[], Dict[str, Any]],
+    ttl: int = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    now = time.time()
+    cached = cache.get(key)
+    if cached and not refresh and now - cached[0] < (ttl or CACHE_TTL):
+        return cached[1]
+    if cached and not upstream_allowed():
         return cached[1]
-    data = safe_fetch_projects(filters=filters or None, limit=6)
-    _recent_cache[key] = (now, data)
+    require_upstream()
+    try:
+        data = loader()
+    except UpstreamBusy:
+        if cached:
+            return cached[1]
+        raise
+    if not response_ok(data):
+        # Keep serving the stale copy while the API is failing.
+        return cached[1] if cached else data
+    cache.pop(key, None)
+    cache[key] = (now, data)
+    while len(cache) > CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)), None)
     return data
 
 
+def get_recent_data(filters: Dict[str, Any], refresh: bool = False) -> Dict[str, Any]:
+    key = filters.get("Filtro_Categoria") or "__all__"
+    return cached_fetch(
+        _recent_cache,
+        key,
+        lambda: compact_payload(safe_fetch_projects(filters=filters or None, limit=6)),
+        ttl=RECENT_CACHE_TTL,
+        refresh=refresh,
+    )
+
+
+def get_explore_data(
+    filters: Dict[str, Any],
+    page: int,
+    limit: int,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    return cached_fetch(
+        _explore_cache,
+        filters_key(filters, page, limit),
+        lambda: compact_payload(safe_fetch_projects(filters=filters, page=page, limit=limit)),
+        refresh=refresh,
+    )
+
+
+def get_stats_data(refresh: bool = False) -> Dict[str, Any]:
+    return cached_fetch(_stats_cache, filters_key(), safe_fetch_stats, refresh=refresh)
+
+
+def get_catalog_data(filters: Dict[str, Any] = None, refresh: bool = False) -> Dict[str, Any]:
+    return cached_fetch(
+        _catalog_cache,
+        filters_key(filters),
+        lambda: safe_fetch_catalogs(filters=filters or None),
+        refresh=refresh,
+    )
+
+
+def project_in_categories(project: Dict[str, Any], categories: set) -> bool:
+    categoria = project.get("Categoria") or {}
+    return categoria.get("Nombre") in categories or str(categoria.get("Id")) in categories
+
+
+def listing_filters(cache: Dict[str, Tuple[float, Dict[str, Any]]], key: str) -> Dict[str, Any]:
+    if cache is _explore_cache:
+        return json.loads(key)[0]
+    return {} if key == "__all__" else {"Filtro_Categoria": key}
+
+
+def purge_listings(match: Callable[[Dict[str, Any], Dict[str, Any]], bool]) -> None:
+    for cache in (_recent_cache, _explore_cache):
+        for key, (_, data) in list(cache.items()):
+            if match(listing_filters(cache, key), data):
+                cache.pop(key, None)
+
+
+def apply_invalidation(scope: str, values: List[Any]) -> None:
+    if scope == "all":
+        for cache in (_recent_cache, _explore_cache, _stats_cache, _catalog_cache, _project_cache):
+            cache.clear()
+        project_aggregates.reset()
+        return
+    _stats_cache.clear()
+    _catalog_cache.clear()
+    if scope == "ids":
+        ids = {int(item) for item in values if str(item).isdigit()}
+        for project_id in ids:
+            _project_cache.pop(project_id, None)
+        project_aggregates.discard(ids)
+        purge_listings(
+            lambda filters, data: any(item.get("Id") in ids for item in data.get("Datos", []))
+        )
+    elif scope == "categories":
+        categories = {str(item) for item in values}
+        project_aggregates.discard_categories(categories)
+        for project_id, (_, project) in list(_project_cache.items()):
+            if project_in_categories(project, categories):
+                _project_cache.pop(project_id, None)
+
+        def match(filters: Dict[str, Any], data: Dict[str, Any]) -> bool:
+            wanted = filters.get("Filtro_Categoria")
+            if not wanted:
+                return True
+            wanted = set(wanted) if isinstance(wanted, list) else {wanted}
+            return bool(wanted & categories) or any(
+                project_in_categories(item, categories) for item in data.get("Datos", [])
+            )
+
+        purge_listings(match)
+
+
+def warm_caches() -> None:
+    get_stats_data(refresh=True)
+    catalog_data = extract_catalogs(get_catalog_data(refresh=True))
+    get_recent_data({}, refresh=True)
+    for category in catalog_data.get("categoria", []) if catalog_data else []:
+        if category.get("value"):
+            get_recent_data({"Filtro_Categoria": category["value"]}, refresh=True)
+    for page in range(1, settings.cache_warm_pages + 1):
+        get_explore_data({}, page, settings.default_limit, refresh=True)
+    load_featured_projects(refresh=True)
+
+
+def sync_aggregates() -> None:
+    meta: Dict[str, Any] = {}
+    seen = []
+    batch = []
+    for project in iter_all_projects(settings, meta=meta):
+        seen.append(project.get("Id"))
+        batch.append(project)
+        if len(batch) >= 200:
+            project_aggregates.observe(batch)
+            batch = []
+    project_aggregates.observe(batch)
+    project_aggregates.complete_sync(seen, meta.get("Total"))
+
+
+cache_warmer = CacheWarmer(
+    warm_caches,
+    interval=settings.cache_warm_interval,
+    jitter=settings.cache_warm_jitter,
+)
+aggregate_syncer = CacheWarmer(
+    sync_aggregates,
+    interval=settings.aggregate_sync_interval,
+    jitter=settings.cache_warm_jitter,
+)
+
+
 def safe_fetch_projects(
     filters: Dict[str, Any] = None,
     page: int = 1,
     limit: int = 24,
 ) -> Dict[str, Any]:
     try:
-        return fetch_projects(settings, filters=filters, page=page, limit=limit)
+        data = fetch_projects(settings, filters=filters, page=page, limit=limit)
+    except UpstreamBusy:
+        raise
     except Exception:
         return {
             "Codigo": "0",
@@ -411,11 +897,18 @@ def safe_fetch_projects(
             "Total": 0,
             "Datos": [],
         }
+    project_aggregates.observe(
+        data.get("Datos", []),
+        total=None if filters else data.get("Total"),
+    )
+    return data
 
 
 def safe_fetch_stats(filters: Dict[str, Any] = None) -> Dict[str, Any]:
     try:
         return fetch_stats(settings, filters=filters)
+    except UpstreamBusy:
+        raise
     except Exception:
         return {}
 
@@ -423,6 +916,8 @@ def safe_fetch_stats(filters: Dict[str, Any] = None) -> Dict[str, Any]:
 def safe_fetch_catalogs(filters: Dict[str, Any] = None) -> Dict[str, Any]:
     try:
         return fetch_catalogs(settings, filters=filters)
+    except UpstreamBusy:
+        raise
     except Exception:
         return {}
 
@@ -456,21 +951,54 @@ def extract_stats(stats_data: Dict[str, Any]) -> Dict[str, int]:
     }
 
 
+def normalize_text(value: Any) -> str:
+    return " ".join(str(value or "").split()).lower()
+
+
+def canonical_args(args) -> MultiDict:
+    items = []
+    texto = normalize_text(args.get("texto"))
+    if texto:
+        items.append(("texto", texto))
+    for key in FILTER_PARAMS:
+        values = {value.strip() for value in args.getlist(key) if value and value.strip()}
+        items.extend((key, value) for value in sorted(values))
+    page = max(safe_int(args.get("page"), 1), 1)
+    limit = min(max(safe_int(args.get("limit"), settings.default_limit), 1), MAX_EXPLORE_LIMIT)
+    if page > 1:
+        items.append(("page", str(page)))
+    if limit != settings.default_limit:
+        items.append(("limit", str(limit)))
+    return MultiDict(items)
+
+
+def is_canonical(args, canonical: MultiDict) -> bool:
+    # Empty fields and default paging do not change the URL's meaning, so a
+    # plain form submit is served directly. Order does: URL-keyed caches in
+    # front of the app would store each permutation separately.
+    defaults = {"page": "1", "limit": str(settings.default_limit)}
+    given = [
+        (key, value)
+        for key, value in args.items(multi=True)
+        if value.strip() and defaults.get(key) != value.strip()
+    ]
+    return given == list(canonical.items(multi=True))
+
+
+def explorar_url(args: MultiDict) -> str:
+    base = url_for("explorar")
+    if not args:
+        return base
+    return f"{base}?{urlencode(list(args.items(multi=True)))}"
+
+
 def build_filters_from_query(args) -> Dict[str, Any]:
     filters = {}
     texto = args.get("texto")
     if texto:
         filters["Filtro_Nombre"] = texto
 
-    multi_mapping = {
-        "carrera": "Filtro_Carrera",
-        "categoria": "Filtro_Categoria",
-        "ano": "Filtro_AnoEscolar",
-        "modalidad": "Filtro_Modalidad",
-        "evento": "Filtro_Evento",
-    }
-
-    for key, api_key in multi_mapping.items():
+    for key, api_key in FILTER_PARAMS.items():
         values = [value for value in args.getlist(key) if value]
         if len(values) == 1:
             filters[api_key] = values[0]
@@ -571,15 +1099,14 @@ def extract_catalogs(catalog_data: Dict[str, Any]) -> Dict[str, List[Dict[str, A
     }
 
 
-def build_active_filters(args, options: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, str]]:
+def build_active_filters(args: MultiDict, options: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, str]]:
     chips: List[Dict[str, str]] = []
-    args_map = args.to_dict(flat=False)
 
     def add_chip(label: str, key: str, value: str = None) -> None:
         chips.append(
             {
                 "label": label,
-                "remove_url": build_remove_url(args_map, key, value),
+                "remove_url": build_remove_url(args, key, value),
             }
         )
 
@@ -609,23 +1136,19 @@ def build_active_filters(args, options: Dict[str, List[Dict[str, Any]]]) -> List
     return chips
 
 
-def build_remove_url(args_map: Dict[str, List[str]], key: str, value: str = None) -> str:
-    new_args: Dict[str, Any] = {k: list(v) for k, v in args_map.items()}
+def build_remove_url(args: MultiDict, key: str, value: str = None) -> str:
+    new_args = args.copy()
     new_args.pop("page", None)
 
     if key not in new_args:
         return url_for("explorar")
 
     if value is None:
-        new_args.pop(key, None)
+        new_args.poplist(key)
     else:
-        values = [item for item in new_args.get(key, []) if item != value]
-        if values:
-            new_args[key] = values
-        else:
-            new_args.pop(key, None)
+        new_args.setlist(key, [item for item in new_args.getlist(key) if item != value])
 
-    return url_for("explorar", **new_args)
+    return explorar_url(canonical_args(new_args))
 
 
 def safe_int(value: Any, default: int) -> int:
@@ -635,20 +1158,33 @@ def safe_int(value: Any, default: int) -> int:
         return default
 
 
-def build_pagination_urls(page: int, limit: int, total: int, args: Dict[str, Any]):
+def build_pagination_urls(page: int, limit: int, total: int, args: MultiDict):
     prev_url = None
     next_url = None
     if page > 1:
-        prev_args = dict(args)
-        prev_args["page"] = page - 1
-        prev_url = url_for("explorar", **prev_args)
+        prev_args = args.copy()
+        prev_args["page"] = str(page - 1)
+        prev_url = explorar_url(canonical_args(prev_args))
     if total > page * limit:
-        next_args = dict(args)
-        next_args["page"] = page + 1
-        next_url = url_for("explorar", **next_args)
+        next_args = args.copy()
+        next_args["page"] = str(page + 1)
+        next_url = explorar_url(canonical_args(next_args))
     return prev_url, next_url
 
 
+def start_background_jobs() -> None:
+    cache_warmer.start()
+    aggregate_syncer.start()
+
+
+# Warm up as soon as a worker exists: at import (skipping the reloader's
+# watcher process) and right after a pre-fork server forks a worker.
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    start_background_jobs()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=start_background_jobs)
+
+
 if __name__ == "__main__":
     if "--tunnel" in sys.argv:
         try:
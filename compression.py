@@ -0,0 +1,113 @@
+﻿import gzip
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/xml",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+STATIC_MAX_SIZE = 1024 * 1024
+STATIC_CACHE_ENTRIES = 64
+_static_cache: Dict[Tuple[str, str], bytes] = {}
+_static_lock = threading.Lock()
+
+
+def available_encodings() -> list:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    return accept_encodings.best_match(available_encodings())
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def compress_stream(chunks: Iterable, encoding: str) -> Iterator[bytes]:
+    # Flush after every chunk so the browser can render what has arrived.
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+            yield compressor.process(data) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+        yield compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def compress_static(response, encoding: str) -> Optional[bytes]:
+    # send_file responses stream straight from disk; small ones are read and
+    # compressed once per file version, keyed by their ETag.
+    etag, _ = response.get_etag()
+    if not etag or not response.content_length or response.content_length > STATIC_MAX_SIZE:
+        return None
+    key = (etag, encoding)
+    with _static_lock:
+        cached = _static_cache.get(key)
+    if cached is None:
+        response.direct_passthrough = False
+        cached = compress_bytes(response.get_data(), encoding)
+        with _static_lock:
+            _static_cache[key] = cached
+            while len(_static_cache) > STATIC_CACHE_ENTRIES:
+                _static_cache.pop(next(iter(_static_cache)), None)
+    else:
+        response.close()
+    # The compressed body differs byte for byte, so only a weak match holds.
+    response.set_etag(etag, weak=True)
+    return cached
+
+
+def compress_response(response, accept_encodings, min_size: int):
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(accept_encodings)
+    if not encoding:
+        return response
+
+    if response.direct_passthrough:
+        if (response.content_length or 0) < min_size:
+            return response
+        data = compress_static(response, encoding)
+        if data is None:
+            return response
+        response.direct_passthrough = False
+        response.set_data(data)
+    elif response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress_bytes(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
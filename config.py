@@ -13,6 +13,27 @@ class Settings:
     request_timeout: int
     default_limit: int
     max_pages: int
+    ids_chunk_size: int
+    ids_workers: int
+    cache_ttl: int
+    cache_warm_interval: int
+    cache_warm_jitter: int
+    cache_warm_pages: int
+    aggregate_sync_interval: int
+    rate_limit: float
+    rate_limit_burst: int
+    upstream_concurrency: int
+    upstream_queue_timeout: float
+    trusted_proxies: int
+    profile_sample_rate: float
+    profile_routes: str
+    profile_interval_ms: int
+    compress_responses: bool
+    compress_min_size: int
+    stream_templates: bool
+    invalidation_token: str
+    invalidation_poll: float
+    db_auto_migrate: bool
     secret_key: str
     app_url: str
     azure_client_id: str
@@ -32,6 +53,27 @@ def load_settings() -> Settings:
         request_timeout=int(os.environ.get("API_TIMEOUT", "15")),
         default_limit=int(os.environ.get("API_LIMIT", "24")),
         max_pages=int(os.environ.get("API_MAX_PAGES", "10")),
+        ids_chunk_size=int(os.environ.get("API_IDS_CHUNK", "50")),
+        ids_workers=int(os.environ.get("API_IDS_WORKERS", "4")),
+        cache_ttl=int(os.environ.get("CACHE_TTL", "60")),
+        cache_warm_interval=int(os.environ.get("CACHE_WARM_INTERVAL", "0")),
+        cache_warm_jitter=int(os.environ.get("CACHE_WARM_JITTER", "10")),
+        cache_warm_pages=int(os.environ.get("CACHE_WARM_PAGES", "1")),
+        aggregate_sync_interval=int(os.environ.get("AGGREGATE_SYNC_INTERVAL", "0")),
+        rate_limit=float(os.environ.get("RATE_LIMIT", "2")),
+        rate_limit_burst=int(os.environ.get("RATE_LIMIT_BURST", "20")),
+        upstream_concurrency=int(os.environ.get("UPSTREAM_CONCURRENCY", "8")),
+        upstream_queue_timeout=float(os.environ.get("UPSTREAM_QUEUE_TIMEOUT", "2")),
+        trusted_proxies=int(os.environ.get("TRUSTED_PROXIES", "0")),
+        profile_sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+        profile_routes=os.environ.get("PROFILE_ROUTES", ""),
+        profile_interval_ms=int(os.environ.get("PROFILE_INTERVAL_MS", "5")),
+        compress_responses=os.environ.get("COMPRESS_RESPONSES", "1") == "1",
+        compress_min_size=int(os.environ.get("COMPRESS_MIN_SIZE", "1024")),
+        stream_templates=os.environ.get("STREAM_TEMPLATES", "1") == "1",
+        invalidation_token=os.environ.get("INVALIDATION_TOKEN", ""),
+        invalidation_poll=float(os.environ.get("INVALIDATION_POLL", "2")),
+        db_auto_migrate=os.environ.get("DB_AUTO_MIGRATE", "1") == "1",
         secret_key=os.environ.get("APP_SECRET_KEY", ""),
         app_url=os.environ.get("APP_URL", "http://localhost:5000"),
         azure_client_id=os.environ.get("AZURE_CLIENT_ID", ""),
@@ -0,0 +1,242 @@
+﻿import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT_DIR = os.path.join(BASE_DIR, "data", "static_site")
+MANIFEST_NAME = "manifest.json"
+RELATED_LIMIT = 6
+
+_web = None
+
+
+def _app():
+    global _web
+    if _web is None:
+        # The export drives its own API calls; keep the app's background jobs off.
+        os.environ["CACHE_WARM_INTERVAL"] = "0"
+        os.environ["AGGREGATE_SYNC_INTERVAL"] = "0"
+        import app as web
+
+        _web = web
+    return _web
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def templates_digest() -> str:
+    digest = hashlib.sha1()
+    templates_dir = os.path.join(BASE_DIR, "templates")
+    for root, _, files in sorted(os.walk(templates_dir)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, templates_dir).encode("utf-8"))
+            with open(path, "rb") as handle:
+                digest.update(handle.read())
+    return digest.hexdigest()
+
+
+def load_manifest(out_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir: str, manifest: Dict[str, Any]) -> None:
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def write_page(path: str, html: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as handle:
+        handle.write(html)
+    os.replace(f"{path}.tmp", path)
+
+
+def project_path(out_dir: str, project_id: Any) -> str:
+    return os.path.join(out_dir, "proyecto", f"{project_id}.html")
+
+
+def category_name(value: str) -> str:
+    # Mirrors /categoria/<value> so the proxy finds the file after decoding
+    # the URL; segments that would leave the output directory are dropped.
+    parts = value.replace("\\", "/").split("/")
+    return "/".join(part for part in parts if part not in ("", ".", "..")) or "-"
+
+
+def category_path(out_dir: str, name: str) -> str:
+    return os.path.join(out_dir, "categoria", f"{name}.html")
+
+
+def remove_pages(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def render_project(job: Tuple[str, Dict[str, Any], List[Dict[str, Any]]]) -> Any:
+    out_dir, project, related = job
+    web = _app()
+    project_id = project.get("Id")
+    base_url = web.settings.app_url.rstrip("/")
+    with web.app.test_request_context(f"/proyecto/{project_id}", base_url=base_url):
+        html = web.render_template("proyecto.html", project=project, related=related)
+    write_page(project_path(out_dir, project_id), html)
+    return project_id
+
+
+def render_category(value: str) -> str:
+    web = _app()
+    base_url = web.settings.app_url.rstrip("/")
+    with web.app.test_request_context(f"/categoria/{quote(value)}", base_url=base_url):
+        return web.render_template(
+            "index.html",
+            **web.index_context(value),
+            active_category=value,
+        )
+
+
+def build_related(projects: List[Dict[str, Any]]) -> Dict[Any, List[Dict[str, Any]]]:
+    by_category: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+    for project in projects:
+        categoria_id = (project.get("Categoria") or {}).get("Id")
+        if categoria_id:
+            by_category[categoria_id].append(project)
+    related = {}
+    for project in projects:
+        categoria_id = (project.get("Categoria") or {}).get("Id")
+        candidates = by_category.get(categoria_id, []) if categoria_id else []
+        related[project.get("Id")] = [
+            item for item in candidates[:RELATED_LIMIT] if item.get("Id") != project.get("Id")
+        ]
+    return related
+
+
+def build_sitemap(base_url: str, entries: List[Tuple[str, str]]) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for path, lastmod in entries:
+        lines.append(f"  <url><loc>{escape(base_url + path)}</loc><lastmod>{lastmod}</lastmod></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def export_site(out_dir: str = DEFAULT_OUT_DIR, workers: Optional[int] = None, full: bool = False) -> Dict[str, int]:
+    web = _app()
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    templates_hash = templates_digest()
+    # A full rebuild ignores the stored hashes but still needs the old entries
+    # to delete pages that no longer exist.
+    stale = full or manifest.get("templates") != templates_hash
+    previous = manifest.get("projects", {})
+    previous_categories = manifest.get("categories", {})
+    today = datetime.utcnow().date().isoformat()
+
+    projects = list(web.iter_all_projects(web.settings))
+    web.project_aggregates.observe(projects)
+    related = build_related(projects)
+
+    current: Dict[str, Dict[str, str]] = {}
+    jobs = []
+    for project in projects:
+        project_id = project.get("Id")
+        if project_id is None:
+            continue
+        digest = _digest([project, related.get(project_id, [])])
+        entry = None if stale else previous.get(str(project_id))
+        if entry and entry.get("hash") == digest and os.path.exists(project_path(out_dir, project_id)):
+            current[str(project_id)] = entry
+            continue
+        current[str(project_id)] = {"hash": digest, "lastmod": today}
+        jobs.append((out_dir, project, related.get(project_id, [])))
+
+    if jobs and (workers or 0) != 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(render_project, jobs, chunksize=16))
+    else:
+        for job in jobs:
+            render_project(job)
+
+    removed = [project_id for project_id in previous if project_id not in current]
+    remove_pages([project_path(out_dir, project_id) for project_id in removed])
+
+    catalog = web.extract_catalogs(web.get_catalog_data(refresh=True))
+    categories = catalog.get("categoria") if catalog else None
+    if not categories:
+        categories = web.build_filter_options(projects).get("categoria", [])
+    category_values = sorted({item.get("value") or item.get("label") for item in categories} - {None, ""})
+    current_categories: Dict[str, Dict[str, str]] = {}
+    for value in category_values:
+        name = category_name(value)
+        html = render_category(value)
+        digest = _digest(html)
+        entry = previous_categories.get(value)
+        if entry and entry.get("hash") == digest and entry.get("name") == name:
+            current_categories[value] = entry
+        else:
+            current_categories[value] = {"hash": digest, "lastmod": today, "name": name}
+        write_page(category_path(out_dir, name), html)
+    kept_names = {entry["name"] for entry in current_categories.values()}
+    removed_categories = [
+        entry["name"]
+        for value, entry in previous_categories.items()
+        if value not in current_categories and entry.get("name") not in kept_names
+    ]
+    remove_pages([category_path(out_dir, name) for name in removed_categories])
+
+    base_url = web.settings.app_url.rstrip("/")
+    entries = [("/", today), ("/explorar", today)]
+    entries += [(f"/categoria/{quote(value)}", entry["lastmod"]) for value, entry in current_categories.items()]
+    entries += [(f"/proyecto/{project_id}", meta["lastmod"]) for project_id, meta in current.items()]
+    write_page(os.path.join(out_dir, "sitemap.xml"), build_sitemap(base_url, entries))
+
+    save_manifest(
+        out_dir,
+        {"templates": templates_hash, "projects": current, "categories": current_categories},
+    )
+    return {
+        "projects": len(current),
+        "rendered": len(jobs),
+        "removed": len(removed),
+        "categories": len(current_categories),
+        "removed_categories": len(removed_categories),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-render project pages and sitemap.xml.")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="Output directory.")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (1 disables the pool).")
+    parser.add_argument("--full", action="store_true", help="Re-render every page, not only changed ones.")
+    args = parser.parse_args(argv)
+    result = export_site(args.out, workers=args.workers, full=args.full)
+    print(
+        f"{result['projects']} projects ({result['rendered']} rendered, {result['removed']} removed), "
+        f"{result['categories']} category pages ({result['removed_categories']} removed) -> {args.out}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+﻿from sys import intern
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_MISSING = object()
+_registry_lock = Lock()
+_refs: Dict[Tuple[Any, ...], "CatalogRef"] = {}
+_student_ids: Dict[Any, int] = {}
+_student_names: List[Any] = []
+
+
+def _intern_value(value: Any) -> Any:
+    if type(value) is str:
+        return intern(value)
+    return value
+
+
+class CatalogRef:
+    __slots__ = ("Id", "Nombre", "extra")
+
+    def __init__(self, ref_id: Any, nombre: Any, extra: Optional[Tuple[Tuple[str, Any], ...]] = None):
+        self.Id = ref_id
+        self.Nombre = nombre
+        self.extra = extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "Id":
+            return self.Id
+        if key == "Nombre":
+            return self.Nombre
+        for extra_key, value in self.extra or ():
+            if extra_key == key:
+                return value
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __getattr__(self, key: str) -> Any:
+        for extra_key, value in self.extra or ():
+            if extra_key == key:
+                return value
+        raise AttributeError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> List[str]:
+        return ["Id", "Nombre"] + [key for key, _ in self.extra or ()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"CatalogRef(Id={self.Id!r}, Nombre={self.Nombre!r})"
+
+
+def intern_ref(kind: str, data: Any) -> Any:
+    if not isinstance(data, dict):
+        return data
+    extra = tuple(
+        sorted(
+            (intern(key), _intern_value(value))
+            for key, value in data.items()
+            if key not in ("Id", "Nombre")
+        )
+    )
+    key = (kind, data.get("Id"), data.get("Nombre"), extra)
+    try:
+        ref = _refs.get(key)
+    except TypeError:
+        # Unhashable nested values: keep an unshared ref rather than failing.
+        return CatalogRef(data.get("Id"), _intern_value(data.get("Nombre")), extra or None)
+    if ref is None:
+        with _registry_lock:
+            ref = _refs.get(key)
+            if ref is None:
+                ref = CatalogRef(data.get("Id"), _intern_value(data.get("Nombre")), extra or None)
+                _refs[key] = ref
+    return ref
+
+
+def intern_student(student: Any) -> Any:
+    student = _intern_value(student)
+    try:
+        student_id = _student_ids.get(student)
+    except TypeError:
+        return student
+    if student_id is None:
+        with _registry_lock:
+            student_id = _student_ids.get(student)
+            if student_id is None:
+                student_id = len(_student_names)
+                _student_names.append(student)
+                _student_ids[student] = student_id
+    return student_id
+
+
+def student_name(student_id: Any) -> Any:
+    if type(student_id) is int:
+        return _student_names[student_id]
+    return student_id
+
+
+class Project:
+    __slots__ = (
+        "Id",
+        "Nombre",
+        "Descripcion",
+        "Carrera",
+        "CicloEscolarAno",
+        "Semestre",
+        "Grupo",
+        "PortadaIMG",
+        "DocumentoPDF",
+        "Categoria",
+        "Modalidad",
+        "Evento",
+        "alumno_ids",
+        "extra",
+    )
+
+    _scalar_fields = (
+        "Id",
+        "Nombre",
+        "Descripcion",
+        "Carrera",
+        "CicloEscolarAno",
+        "Semestre",
+        "Grupo",
+        "PortadaIMG",
+        "DocumentoPDF",
+    )
+    _ref_fields = ("Categoria", "Modalidad", "Evento")
+    _known_fields = _scalar_fields + _ref_fields + ("Alumnos",)
+
+    def __init__(self, data: Dict[str, Any]):
+        for field in self._scalar_fields:
+            setattr(self, field, _intern_value(data.get(field)))
+        for field in self._ref_fields:
+            setattr(self, field, intern_ref(field, data.get(field)))
+        alumnos = data.get("Alumnos")
+        if isinstance(alumnos, list):
+            self.alumno_ids = tuple(intern_student(student) for student in alumnos)
+        else:
+            self.alumno_ids = alumnos
+        extra = {
+            intern(key): value for key, value in data.items() if key not in self._known_fields
+        }
+        self.extra = extra or None
+
+    @property
+    def Alumnos(self) -> Any:
+        if isinstance(self.alumno_ids, tuple):
+            return [student_name(student_id) for student_id in self.alumno_ids]
+        return self.alumno_ids
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._known_fields:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __getattr__(self, key: str) -> Any:
+        extra = object.__getattribute__(self, "extra")
+        if extra and key in extra:
+            return extra[key]
+        raise AttributeError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> List[str]:
+        return [key for key in self._known_fields if key in self] + list(self.extra or ())
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {}
+        for key, value in self.items():
+            result[key] = value.to_dict() if isinstance(value, CatalogRef) else value
+        return result
+
+    def __repr__(self) -> str:
+        return f"Project(Id={self.get('Id')!r}, Nombre={self.get('Nombre')!r})"
+
+
+def compact_project(data: Any) -> Any:
+    if isinstance(data, Project) or not isinstance(data, dict):
+        return data
+    return Project(data)
+
+
+def compact_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    datos = data.get("Datos")
+    if not isinstance(datos, list):
+        return data
+    compact = dict(data)
+    compact["Datos"] = [compact_project(item) for item in datos]
+    return compact
@@ -0,0 +1,160 @@
+﻿from collections import Counter
+from contextlib import contextmanager
+import os
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MAX_STACK_DEPTH = 64
+MAX_STACKS_PER_ROUTE = 5000
+TRUNCATED_STACK = "[otros]"
+
+
+def parse_route_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in (value or "").split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            try:
+                rates[name.strip()] = float(rate)
+            except ValueError:
+                continue
+    return rates
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def collapse_stack(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackProfiler:
+    def __init__(self, default_rate: float, route_rates: Dict[str, float] = None, interval: float = 0.005):
+        self.default_rate = default_rate
+        self.route_rates = route_rates or {}
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active: Dict[int, str] = {}
+        self._busy = threading.Event()
+        self._stacks: Dict[str, Counter] = {}
+        self._requests: Counter = Counter()
+        self._wall: Counter = Counter()
+        self._updated: Dict[str, float] = {}
+        self._pid: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.default_rate > 0 or any(rate > 0 for rate in self.route_rates.values())
+
+    def should_sample(self, route: Optional[str]) -> bool:
+        if not route:
+            return False
+        rate = self.route_rates.get(route, self.default_rate)
+        return rate > 0 and random.random() < rate
+
+    def begin(self, route: str) -> Tuple[int, str, float]:
+        self._ensure_sampler()
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active[thread_id] = route
+            self._busy.set()
+        return thread_id, route, time.perf_counter()
+
+    @contextmanager
+    def attach(self, route: str) -> Iterator[None]:
+        # Samples a helper thread doing work for a profiled request under the
+        # request's route, without counting it as a request of its own.
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active[thread_id] = route
+            self._busy.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active.pop(thread_id, None)
+
+    def end(self, token: Tuple[int, str, float]) -> None:
+        thread_id, route, started = token
+        with self._lock:
+            self._active.pop(thread_id, None)
+            self._requests[route] += 1
+            self._wall[route] += time.perf_counter() - started
+            self._updated[route] = time.time()
+
+    def _ensure_sampler(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._sample_loop, name="stack-sampler", daemon=True).start()
+
+    def _sample_loop(self) -> None:
+        # Sleeps on the event while no profiled request is running, so an idle
+        # worker pays nothing for the sampler.
+        while True:
+            self._busy.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._busy.clear()
+                    continue
+                frames = sys._current_frames()
+                for thread_id, route in list(self._active.items()):
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    stacks = self._stacks.setdefault(route, Counter())
+                    stack = collapse_stack(frame)
+                    if stack not in stacks and len(stacks) >= MAX_STACKS_PER_ROUTE:
+                        stack = TRUNCATED_STACK
+                    stacks[stack] += 1
+
+    def collapsed(self, route: str) -> str:
+        with self._lock:
+            stacks = dict(self._stacks.get(route, {}))
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    def summary(self, top: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            routes = sorted(set(self._requests) | set(self._stacks))
+            result = []
+            for route in routes:
+                stacks = self._stacks.get(route, Counter())
+                leaves: Counter = Counter()
+                for stack, count in stacks.items():
+                    leaves[stack.rsplit(";", 1)[-1]] += count
+                requests_count = self._requests.get(route, 0)
+                total = sum(stacks.values())
+                result.append(
+                    {
+                        "route": route,
+                        "requests": requests_count,
+                        "samples": total,
+                        "avg_ms": (self._wall[route] / requests_count * 1000) if requests_count else 0,
+                        "updated": self._updated.get(route),
+                        "hot": [
+                            {"frame": frame, "samples": count, "share": count / total if total else 0}
+                            for frame, count in leaves.most_common(top)
+                        ],
+                    }
+                )
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+            self._wall.clear()
+            self._updated.clear()
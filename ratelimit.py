@@ -0,0 +1,101 @@
+﻿from contextlib import contextmanager
+import threading
+import time
+from typing import Dict, Hashable, Iterator, Optional
+
+
+class UpstreamBusy(Exception):
+    pass
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, amount: float = 1.0) -> bool:
+        self._refill(time.monotonic())
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def retry_after(self, amount: float = 1.0) -> int:
+        missing = max(amount - self.tokens, 0)
+        return max(int(missing / self.rate + 0.999), 1) if self.rate else 60
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def hit(self, key: Hashable) -> Optional[int]:
+        # Returns None when allowed, otherwise the seconds to wait.
+        if not self.enabled:
+            return None
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune()
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[key] = bucket
+            if bucket.consume():
+                return None
+            return bucket.retry_after()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[key]
+
+
+class UpstreamLimiter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._semaphore: Optional[threading.BoundedSemaphore] = None
+        self._size = 0
+
+    def _get(self, size: int) -> threading.BoundedSemaphore:
+        if self._semaphore is None or self._size != size:
+            with self._lock:
+                if self._semaphore is None or self._size != size:
+                    self._semaphore = threading.BoundedSemaphore(size)
+                    self._size = size
+        return self._semaphore
+
+    @contextmanager
+    def slot(self, size: int, timeout: float) -> Iterator[None]:
+        if size <= 0:
+            yield
+            return
+        semaphore = self._get(size)
+        if not semaphore.acquire(timeout=max(timeout, 0)):
+            raise UpstreamBusy(f"No upstream slot free after {timeout}s")
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+upstream_limiter = UpstreamLimiter()
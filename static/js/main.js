@@ -18,6 +18,32 @@
     revealItems.forEach((item) => observer.observe(item));
 })();
 
+// Search forms: submit only filled fields, with the text normalized and the
+// values of each filter sorted, so the server does not have to redirect to
+// the canonical URL.
+const submitSearch = (form) => {
+    const fields = new Map();
+    new FormData(form).forEach((value, key) => {
+        const clean = key === "texto" ? value.trim().replace(/\s+/g, " ").toLowerCase() : value.trim();
+        if (!clean) return;
+        if (!fields.has(key)) fields.set(key, new Set());
+        fields.get(key).add(clean);
+    });
+    const params = new URLSearchParams();
+    fields.forEach((values, key) => {
+        Array.from(values).sort().forEach((value) => params.append(key, value));
+    });
+    const query = params.toString();
+    window.location.assign(query ? `${form.action}?${query}` : form.action);
+};
+
+document.querySelectorAll(".filters, .nav-search").forEach((form) => {
+    form.addEventListener("submit", (event) => {
+        event.preventDefault();
+        submitSearch(form);
+    });
+});
+
 // Filter form auto-submit
 (() => {
     const filterForm = document.querySelector(".filters");
@@ -29,13 +55,13 @@
     if (textInput) {
         textInput.addEventListener("input", () => {
             if (textTimer) clearTimeout(textTimer);
-            textTimer = setTimeout(() => filterForm.submit(), 600);
+            textTimer = setTimeout(() => submitSearch(filterForm), 600);
         });
     }
 
     filterForm.addEventListener("change", (event) => {
         if (event.target === textInput) return;
-        filterForm.submit();
+        submitSearch(filterForm);
     });
 })();
 
@@ -210,12 +236,11 @@ window.addEventListener('resize', () => {
     };
 
     let controller = null;
-    const fetchRecent = async (url) => {
+    const fetchRecent = async (url, category) => {
         if (controller) controller.abort();
         controller = new AbortController();
 
-        const params = new URL(url).search;
-        const endpoint = `/recientes${params}`;
+        const endpoint = category ? `/recientes?categoria=${encodeURIComponent(category)}` : "/recientes";
         setLoading(true);
         try {
             const response = await fetch(endpoint, {
@@ -238,7 +263,7 @@ window.addEventListener('resize', () => {
         const url = link.href;
         setActive(url);
         if (push) window.history.pushState({}, "", url);
-        fetchRecent(url);
+        fetchRecent(url, link.dataset.categoria);
     };
 
     links.forEach((link) => {
@@ -1,11 +1,22 @@
-﻿import os
+﻿from contextlib import contextmanager
+import json
+import os
 import sqlite3
-from datetime import datetime
-from typing import Iterable, List
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_DIR = os.path.join(BASE_DIR, "data")
 DB_PATH = os.path.join(DB_DIR, "app.db")
+LOCK_PATH = os.path.join(DB_DIR, "app.db.lock")
 
 
 def _ensure_dir() -> None:
@@ -19,30 +30,120 @@ def _connect() -> sqlite3.Connection:
     return conn
 
 
-def init_db(super_admin_email: str) -> None:
-    conn = _connect()
-    with conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS admins (
-                email TEXT PRIMARY KEY,
-                created_at TEXT NOT NULL
-            )
-            """
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS admins (
+            email TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL
         )
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS featured (
-                project_id INTEGER PRIMARY KEY,
-                created_at TEXT NOT NULL
-            )
-            """
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS featured (
+            project_id INTEGER PRIMARY KEY,
+            created_at TEXT NOT NULL
         )
-        if super_admin_email:
-            conn.execute(
-                "INSERT OR IGNORE INTO admins (email, created_at) VALUES (?, ?)",
-                (super_admin_email.lower(), datetime.utcnow().isoformat()),
-            )
+        """
+    )
+
+
+def _create_invalidations(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS invalidations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scope TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+# Append new steps with the next version number; never edit an applied one.
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _create_base_tables),
+    (2, _create_invalidations),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+@contextmanager
+def _migration_lock() -> Iterator[None]:
+    _ensure_dir()
+    with open(LOCK_PATH, "a+") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _user_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def schema_version() -> int:
+    return _user_version(_connect())
+
+
+def migrate(super_admin_email: str = "") -> int:
+    with _migration_lock():
+        conn = _connect()
+        conn.isolation_level = None
+        current = _user_version(conn)
+        for version, step in MIGRATIONS:
+            if version <= current:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            current = version
+        # WAL lets workers read while another process writes.
+        conn.execute("PRAGMA journal_mode=WAL")
+    seed_super_admin(super_admin_email)
+    return current
+
+
+def seed_super_admin(email: str) -> None:
+    if not email:
+        return
+    conn = _connect()
+    # Read first so a normal start does not take the write lock.
+    if conn.execute("SELECT 1 FROM admins WHERE email = ?", (email.lower(),)).fetchone():
+        return
+    add_admin(email)
+
+
+def init_db(super_admin_email: str, auto_migrate: bool = True) -> None:
+    if schema_version() >= SCHEMA_VERSION:
+        seed_super_admin(super_admin_email)
+        return
+    if not auto_migrate:
+        raise RuntimeError(
+            f"Database schema is at version {schema_version()}, expected {SCHEMA_VERSION}. "
+            "Run `python store.py migrate` before starting the app."
+        )
+    migrate(super_admin_email)
 
 
 def list_admins() -> List[str]:
@@ -106,3 +207,49 @@ def remove_featured(project_id: int) -> None:
     conn = _connect()
     with conn:
         conn.execute("DELETE FROM featured WHERE project_id = ?", (project_id,))
+
+
+def add_invalidation(scope: str, values: Iterable[Any] = ()) -> int:
+    now = datetime.utcnow()
+    conn = _connect()
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO invalidations (scope, payload, created_at) VALUES (?, ?, ?)",
+            (scope, json.dumps(list(values)), now.isoformat()),
+        )
+        conn.execute(
+            "DELETE FROM invalidations WHERE created_at < ?",
+            ((now - timedelta(days=1)).isoformat(),),
+        )
+    return int(cursor.lastrowid)
+
+
+def latest_invalidation_id() -> int:
+    conn = _connect()
+    row = conn.execute("SELECT MAX(id) AS last_id FROM invalidations").fetchone()
+    return int(row["last_id"] or 0)
+
+
+def list_invalidations_since(last_id: int) -> List[Dict[str, Any]]:
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT id, scope, payload FROM invalidations WHERE id > ? ORDER BY id",
+        (last_id,),
+    ).fetchall()
+    return [
+        {"id": int(row["id"]), "scope": row["scope"], "values": json.loads(row["payload"])}
+        for row in rows
+    ]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    if command == "version":
+        print(f"Schema version {schema_version()} (latest {SCHEMA_VERSION})")
+    elif command == "migrate":
+        from config import load_settings
+
+        print(f"Schema migrated to version {migrate(load_settings().super_admin_email)}")
+    else:
+        print("Usage: python store.py [migrate|version]")
+        sys.exit(1)
@@ -0,0 +1,58 @@
+﻿from concurrent.futures import Future
+from typing import Any, Iterable, Iterator
+
+FLUSH_SIZE = 8 * 1024
+
+
+class LazyValue:
+    __slots__ = ("_future", "_key")
+
+    def __init__(self, future: Future, key: str):
+        self._future = future
+        self._key = key
+
+    def resolve(self) -> Any:
+        return self._future.result()[self._key]
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.resolve()[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.resolve())
+
+    def __len__(self) -> int:
+        return len(self.resolve())
+
+    def __bool__(self) -> bool:
+        return bool(self.resolve())
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self.resolve()
+
+    def __eq__(self, other: Any) -> bool:
+        return self.resolve() == other
+
+    def __hash__(self) -> int:
+        return hash(self.resolve())
+
+    def __str__(self) -> str:
+        return str(self.resolve())
+
+
+def coalesce_chunks(chunks: Iterable[str], future: Future) -> Iterator[str]:
+    # While the data is still loading, send each chunk at once so the page head
+    # reaches the browser; afterwards batch chunks into larger writes.
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= FLUSH_SIZE or not future.done():
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from api_client import decode_json, iter_json_list_items
+
+DOCUMENT = {
+    "Codigo": "1",
+    "Mensaje": "OK \"Datos\" ñandú",
+    "Total": 12.5,
+    "Escala": -3e-2,
+    "Pagina": 10,
+    "Datos": [
+        {"Id": 1, "Nombre": "Robótica", "Puntaje": 98.25, "Activo": True, "Extra": None},
+        {"Id": 22, "Nombre": "Café ☕", "Puntaje": -1.5e10, "Alumnos": ["Ana", "Luis"]},
+        123456,
+        0.001,
+    ],
+    "Despues": [1, 2.5],
+}
+
+
+def _chunks(raw: bytes, size: int):
+    return [raw[index:index + size] for index in range(0, len(raw), size)]
+
+
+def _parse(chunks):
+    meta = {}
+    items = list(iter_json_list_items(chunks, meta=meta))
+    return items, meta
+
+
+def _expected_meta():
+    return {key: value for key, value in DOCUMENT.items() if key != "Datos"}
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_every_split_point(indent):
+    raw = json.dumps(DOCUMENT, ensure_ascii=False, indent=indent).encode("utf-8")
+    for split in range(1, len(raw)):
+        items, meta = _parse([raw[:split], raw[split:]])
+        assert items == DOCUMENT["Datos"], split
+        assert meta == _expected_meta(), split
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 20])
+def test_fixed_chunk_sizes(size):
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+    items, meta = _parse(_chunks(raw, size))
+    assert items == DOCUMENT["Datos"]
+    assert meta == _expected_meta()
+
+
+def test_number_split_at_decimal_point():
+    items, meta = _parse([b'{"Total": 12.', b'5, "Datos": [1', b"0, 2e", b"3]}"])
+    assert meta == {"Total": 12.5}
+    assert items == [10, 2000.0]
+
+
+def test_empty_chunks_are_ignored():
+    items, meta = _parse([b"", b'{"Datos"', b"", b": []", b"", b', "Total": 0}'])
+    assert items == []
+    assert meta == {"Total": 0}
+
+
+def test_empty_object():
+    assert _parse([b"{ }"]) == ([], {})
+
+
+def test_truncated_stream_raises():
+    with pytest.raises(ValueError):
+        _parse([b'{"Datos": [{"Id": 1}, {"Id": 2'])
+
+
+def test_decode_json_matches_stdlib():
+    raw = json.dumps(DOCUMENT).encode("utf-8")
+    assert decode_json(raw) == DOCUMENT
@@ -0,0 +1,51 @@
+﻿import logging
+import os
+import random
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    def __init__(self, job: Callable[[], None], interval: float, jitter: float = 0.0):
+        self.job = job
+        self.interval = interval
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def start(self) -> bool:
+        # Threads do not survive fork, so each worker process starts its own.
+        if not self.enabled or self._pid == os.getpid():
+            return False
+        with self._lock:
+            if self._pid == os.getpid():
+                return False
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> None:
+        try:
+            self.job()
+        except Exception:
+            logger.exception("Cache warm-up failed")
+
+    def _run(self) -> None:
+        # The first pass runs at once so a fresh worker is warm; jitter only
+        # spreads the later refreshes.
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(max(self.interval + random.uniform(-self.jitter, self.jitter), 1))